@@ -1,7 +1,16 @@
 import os
-import json
-import requests
-from flask import Flask, request
+import hmac
+import logging
+import asyncio
+import functools
+from collections import deque
+import httpx
+import orjson
+import struct
+import redis.asyncio as redis
+from cachetools import Cache, TTLCache
+from quart import Quart, Response, request, abort
+from quart.json.provider import JSONProvider
 from dotenv import load_dotenv
 from typing import Optional, Tuple, Dict, Any
 
@@ -9,7 +18,33 @@ from typing import Optional, Tuple, Dict, Any
 load_dotenv()
 
 
-app = Flask(__name__)
+# Per-update detail is logged at INFO/DEBUG; keep it off unless asked for.
+# LOG_LEVEL only applies to the bot's own logger: libraries stay at WARNING
+# (httpx logs every request URL at INFO, and Telegram's contain the bot token)
+logging.basicConfig(
+    level=logging.WARNING,
+    format="[%(asctime)s] %(levelname)s in %(module)s: %(message)s",
+)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+
+
+class OrjsonProvider(JSONProvider):
+    """Quart JSON provider backed by orjson."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+if isinstance(logging.getLevelName(LOG_LEVEL), int):
+    app.logger.setLevel(LOG_LEVEL)
+else:
+    app.logger.setLevel(logging.WARNING)
+    app.logger.warning(f"Unknown LOG_LEVEL {LOG_LEVEL!r}, using WARNING")
 
 
 # === CONFIGURATION ===
@@ -19,160 +54,385 @@ API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
 
 # Support multiple admins
 ADMIN_IDS_STR = os.getenv("ADMIN_CHAT_IDS", os.getenv("ADMIN_CHAT_ID", "0"))
-ADMIN_IDS = [int(id.strip()) for id in ADMIN_IDS_STR.split(",") if id.strip()]
+ADMIN_IDS = frozenset(int(id.strip()) for id in ADMIN_IDS_STR.split(",") if id.strip())
+
+# Single-admin deployments (the common case) only need one integer compare
+if len(ADMIN_IDS) == 1:
+    ADMIN_ID = next(iter(ADMIN_IDS))
+
+    def is_admin(user_id: Optional[int]) -> bool:
+        return user_id == ADMIN_ID
+else:
+    is_admin = ADMIN_IDS.__contains__
 
 
 WEBHOOK_URL = os.getenv("WEBHOOK_URL") or os.getenv("RENDER_EXTERNAL_URL")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")  # Echoed by Telegram in X-Telegram-Bot-Api-Secret-Token
+# Concurrent webhook deliveries Telegram may open (Bot API allows 1-100)
+WEBHOOK_MAX_CONNECTIONS = min(max(int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "100")), 1), 100)
 
 
 # GitHub Gist configuration
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # Your GitHub personal access token
 GIST_ID = os.getenv("GIST_ID")  # Your Gist ID (created once)
+GIST_FLUSH_INTERVAL = 2.0  # Seconds to coalesce changes before saving to Gist
+GIST_RETRY_INTERVAL = 30.0  # Seconds between attempts to load the Gist after a failure
+GIST_FILES = ('forward_map.json', 'replied_messages.json')
+# Newest entries kept per Gist file; GitHub truncates file content over 1 MB (~10k mappings ≈ 0.35 MB)
+GIST_MAX_ENTRIES = 10_000
+GIST_CACHE_FILE = os.getenv("GIST_CACHE_FILE", "gist_cache.json")  # Local copy + ETag of the Gist
+
+
+# Each forward mapping and replied flag expires this many seconds after it is stored
+STATE_TTL = 7 * 86400
+
+
+# Redis configuration (optional); when set it replaces the in-memory state and the Gist
+REDIS_URL = os.getenv("REDIS_URL")
+# One key per entry so each expires STATE_TTL after it was written
+REDIS_FORWARD_KEY = "bot:fwd:{}"  # forwarded_msg_id → REDIS_FORWARD(orig_chat_id, orig_msg_id)
+REDIS_REPLIED_KEY = "bot:replied:{}"  # Present if the message ID has been replied to
+REDIS_FORWARD = struct.Struct("<qq")  # Fixed 16-byte (chat_id, msg_id) value
+
+
+# Supported media: (message key, Bot API send method)
+MEDIA_TYPES = (
+    ('photo', 'sendPhoto'),
+    ('video', 'sendVideo'),
+    ('document', 'sendDocument'),
+    ('audio', 'sendAudio'),
+    ('voice', 'sendVoice'),
+    ('sticker', 'sendSticker'),
+)
+MEDIA_KEYS = frozenset(media_type for media_type, _ in MEDIA_TYPES)
+
+
+# Message entity types that count as addressing the bot
+MENTION_TYPES = frozenset({"mention", "text_mention"})
+
+
+# Data storage (used unless REDIS_URL is set)
+STATE_MAX_SIZE = 100_000  # Least recently used entries are dropped beyond this
+# Mappings are stored as one int: chat_id in the high bits, message_id in the low
+# MSG_ID_BITS. Negative (group) chat_ids round-trip because >> is arithmetic.
+MSG_ID_BITS = 40
+MSG_ID_MASK = (1 << MSG_ID_BITS) - 1
+# forwarded_msg_id → pack_forward(orig_chat_id, orig_msg_id)
+forward_map = TTLCache(maxsize=STATE_MAX_SIZE, ttl=STATE_TTL)
+# Message IDs that have been replied to (used as a set; values are always True)
+replied_messages = TTLCache(maxsize=STATE_MAX_SIZE, ttl=STATE_TTL)
+
+
+# Shared HTTP clients, created once the server starts serving.
+# Keep-alive connections are pooled per host and reused across updates.
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+# Admin status messages get their own small pool so a burst of them can't starve user-facing sends
+NOTIFY_LIMITS = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+HTTP_RETRIES = 2  # Retries on connection failures only; POSTs are never replayed
+# Fail fast on connect; leave room for slow sends (e.g. large media) to finish
+TELEGRAM_TIMEOUT = httpx.Timeout(27, connect=3.05)
+telegram_client: Optional[httpx.AsyncClient] = None  # Replies and forwards
+notify_client: Optional[httpx.AsyncClient] = None  # Admin info and status notices
+github_client: Optional[httpx.AsyncClient] = None
+redis_client: Optional[redis.Redis] = None
+
+
+# Set whenever state changes; the flush task saves it to the Gist in the background
+gist_dirty = asyncio.Event()
+gist_flush_task: Optional[asyncio.Task] = None
+# Only write back once the Gist has been read, so a failed load can't overwrite it;
+# until then flush_gist_loop keeps retrying the load
+gist_loaded = False
+
+
+def read_gist_cache() -> Optional[Dict[str, Any]]:
+    """Read the local copy of the last Gist snapshot and its ETag, if present."""
+    try:
+        with open(GIST_CACHE_FILE, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
 
 
-# Data storage
-forward_map = {}  # forwarded_msg_id → (orig_chat_id, orig_msg_id)
-replied_messages = set()  # Set of message IDs that have been replied to
+def write_gist_cache(etag: Optional[str], files: Dict[str, str]) -> None:
+    """Keep a local copy of the Gist snapshot so an unchanged Gist needn't be re-downloaded."""
+    if not etag:
+        return
+    
+    try:
+        with open(GIST_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps({'etag': etag, 'files': files}))
+    except OSError as e:
+        app.logger.warning(f"Could not write Gist cache: {e}")
+
+
+def merge_into_cache(cache: TTLCache, loaded: Dict[int, Any]) -> None:
+    """Add loaded entries to a cache beneath the ones already in it, which are newer."""
+    with cache.timer:
+        cache.expire()
+        current = [(k, Cache.__getitem__(cache, k)) for k in Cache.__iter__(cache)]
+    cache.clear()
+    cache.update(loaded)
+    cache.update(current)
+
+
+def apply_gist_files(files: Dict[str, str]) -> None:
+    """Merge the contents of the Gist files into the in-memory state."""
+    # Load forward_map
+    content = files.get('forward_map.json', '')
+    if content.strip():  # Check if content is not empty
+        data = {int(k): pack_forward(*v) for k, v in orjson.loads(content).items()}
+        merge_into_cache(forward_map, data)
+        app.logger.info(f"Loaded {len(data)} forward mappings from Gist")
+    
+    # Load replied_messages
+    content = files.get('replied_messages.json', '')
+    if content.strip():  # Check if content is not empty
+        data = dict.fromkeys(orjson.loads(content), True)
+        merge_into_cache(replied_messages, data)
+        app.logger.info(f"Loaded {len(data)} replied messages from Gist")
 
 
-def load_data_from_gist():
-    """Load data from GitHub Gist."""
-    global forward_map, replied_messages
+async def load_data_from_gist():
+    """Load data from GitHub Gist, skipping the download if the local copy is current."""
+    global gist_loaded
+    
+    if REDIS_URL:
+        app.logger.info("Using Redis storage, skipping Gist")
+        return
     
     if not GITHUB_TOKEN or not GIST_ID:
         app.logger.warning("GitHub token or Gist ID not configured, using memory storage")
         return
     
     try:
-        headers = {
-            'Authorization': f'token {GITHUB_TOKEN}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
+        cache = read_gist_cache()
+        headers = {'If-None-Match': cache['etag']} if cache else {}
         
-        response = requests.get(f'https://api.github.com/gists/{GIST_ID}', headers=headers)
+        response = await github_client.get(f'/gists/{GIST_ID}', headers=headers)
         
-        if response.status_code == 200:
-            gist_data = response.json()
-            
-            # Load forward_map
-            if 'forward_map.json' in gist_data['files']:
-                content = gist_data['files']['forward_map.json']['content']
-                if content.strip():  # Check if content is not empty
-                    data = json.loads(content)
-                    forward_map = {int(k): tuple(v) for k, v in data.items()}
-                    app.logger.info(f"Loaded {len(forward_map)} forward mappings from Gist")
-            
-            # Load replied_messages
-            if 'replied_messages.json' in gist_data['files']:
-                content = gist_data['files']['replied_messages.json']['content']
-                if content.strip():  # Check if content is not empty
-                    replied_messages = set(json.loads(content))
-                    app.logger.info(f"Loaded {len(replied_messages)} replied messages from Gist")
+        if response.status_code == 304:
+            app.logger.info("Gist unchanged, loading local copy")
+            apply_gist_files(cache['files'])
+            gist_loaded = True
+        elif response.status_code == 200:
+            gist_data = orjson.loads(response.content)
+            gist_files = {name: gist_data['files'][name] for name in GIST_FILES if name in gist_data['files']}
+            truncated = [name for name, f in gist_files.items() if f.get('truncated')]
+            if truncated:
+                # Partial JSON can't be parsed; treat it as a failed load rather than start empty
+                app.logger.error(f"Gist content truncated by GitHub: {', '.join(truncated)}")
+            else:
+                files = {name: f['content'] for name, f in gist_files.items()}
+                apply_gist_files(files)
+                write_gist_cache(response.headers.get('ETag'), files)
+                gist_loaded = True
         else:
             app.logger.error(f"Failed to load from Gist: {response.status_code}")
             
     except Exception as e:
         app.logger.error(f"Error loading from Gist: {e}")
+    
+    if not gist_loaded:
+        app.logger.error("Gist not loaded; changes won't be saved to it until a retry succeeds")
 
 
-def save_data_to_gist():
-    """Save data to GitHub Gist."""
-    if not GITHUB_TOKEN or not GIST_ID:
-        return
+async def save_data_to_gist() -> bool:
+    """Save data to GitHub Gist. Returns False if the save failed and should be retried."""
+    if REDIS_URL or not GITHUB_TOKEN or not GIST_ID or not gist_loaded:
+        return True
     
     try:
-        headers = {
-            'Authorization': f'token {GITHUB_TOKEN}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
-        
         # Prepare data
-        forward_map_data = {str(k): list(v) for k, v in forward_map.items()}
-        replied_messages_data = list(replied_messages)
+        # Freeze the caches' clocks and drop expired entries so the rest can be read
+        # through the plain Cache methods: they iterate the underlying dict (oldest
+        # insertion first) and don't mark entries as recently used, unlike TTLCache's.
+        # Keep only the newest GIST_MAX_ENTRIES to stay under GitHub's 1 MB limit.
+        # Packed values can exceed 64 bits, so persist them as [chat_id, msg_id] pairs
+        with forward_map.timer, replied_messages.timer:
+            forward_map.expire()
+            replied_messages.expire()
+            forward_map_data = {
+                str(k): unpack_forward(Cache.__getitem__(forward_map, k))
+                for k in deque(Cache.__iter__(forward_map), maxlen=GIST_MAX_ENTRIES)
+            }
+            replied_messages_data = list(deque(Cache.__iter__(replied_messages), maxlen=GIST_MAX_ENTRIES))
         
         # Update Gist
         gist_data = {
             'files': {
                 'forward_map.json': {
-                    'content': json.dumps(forward_map_data, indent=2)
+                    'content': orjson.dumps(forward_map_data).decode()
                 },
                 'replied_messages.json': {
-                    'content': json.dumps(replied_messages_data, indent=2)
+                    'content': orjson.dumps(replied_messages_data).decode()
                 }
             }
         }
         
-        response = requests.patch(f'https://api.github.com/gists/{GIST_ID}', 
-                                headers=headers, 
-                                json=gist_data)
+        response = await github_client.patch(f'/gists/{GIST_ID}',
+                                             content=orjson.dumps(gist_data),
+                                             headers={'Content-Type': 'application/json'})
         
         if response.status_code == 200:
             app.logger.info("Data saved to Gist successfully")
-        else:
-            app.logger.error(f"Failed to save to Gist: {response.status_code}")
+            write_gist_cache(
+                response.headers.get('ETag'),
+                {name: f['content'] for name, f in gist_data['files'].items()}
+            )
+            return True
+        
+        app.logger.error(f"Failed to save to Gist: {response.status_code}")
             
     except Exception as e:
         app.logger.error(f"Error saving to Gist: {e}")
+    
+    return False
+
+
+def pack_forward(chat_id: int, msg_id: int) -> int:
+    """Pack an original (chat_id, msg_id) pair into a single int."""
+    return (chat_id << MSG_ID_BITS) | (msg_id & MSG_ID_MASK)
+
+
+def unpack_forward(packed: int) -> Tuple[int, int]:
+    """Split a packed forward_map value back into (chat_id, msg_id)."""
+    return packed >> MSG_ID_BITS, packed & MSG_ID_MASK
+
+
+async def remember_forward(fwd_id: int, chat_id: int, msg_id: int) -> None:
+    """Store a forward mapping, evicting the least recently used one when full."""
+    if redis_client:
+        await redis_client.set(
+            REDIS_FORWARD_KEY.format(fwd_id), REDIS_FORWARD.pack(chat_id, msg_id), ex=STATE_TTL
+        )
+        return
+    
+    forward_map[fwd_id] = pack_forward(chat_id, msg_id)
+    gist_dirty.set()
+
+
+async def lookup_forward(fwd_id: int) -> Optional[Tuple[int, int]]:
+    """Return the original (chat_id, msg_id) of a forwarded message, if known."""
+    if redis_client:
+        value = await redis_client.get(REDIS_FORWARD_KEY.format(fwd_id))
+        if value is None:
+            return None
+        return REDIS_FORWARD.unpack(value)
+    
+    packed = forward_map.get(fwd_id)
+    if packed is None:
+        return None
+    return unpack_forward(packed)
 
 
-def telegram_api(method: str, **params) -> dict:
-    """Helper to call the Telegram Bot API."""
-    resp = requests.post(f"{API_URL}/{method}", data=params)
-    if not resp.ok or not resp.json().get("ok"):
+async def mark_replied(msg_id: int) -> None:
+    """Record that a user's message has been replied to."""
+    if redis_client:
+        await redis_client.set(REDIS_REPLIED_KEY.format(msg_id), 1, ex=STATE_TTL)
+        return
+    
+    replied_messages[msg_id] = True
+    gist_dirty.set()
+
+
+async def is_replied(msg_id: Optional[int]) -> bool:
+    """Check whether a user's message has been replied to."""
+    if msg_id is None:
+        return False
+    if redis_client:
+        return bool(await redis_client.exists(REDIS_REPLIED_KEY.format(msg_id)))
+    return msg_id in replied_messages
+
+
+async def flush_gist_loop() -> None:
+    """Save to Gist at most once per GIST_FLUSH_INTERVAL while there are changes."""
+    if REDIS_URL or not GITHUB_TOKEN or not GIST_ID:
+        return
+    
+    # Nothing is saved until the Gist has been read; keep retrying a failed startup load
+    while not gist_loaded:
+        await asyncio.sleep(GIST_RETRY_INTERVAL)
+        await load_data_from_gist()
+    
+    while True:
+        await gist_dirty.wait()
+        await asyncio.sleep(GIST_FLUSH_INTERVAL)
+        gist_dirty.clear()
+        try:
+            saved = await save_data_to_gist()
+        except asyncio.CancelledError:
+            gist_dirty.set()  # Interrupted mid-save; leave it to shutdown()
+            raise
+        if not saved:
+            gist_dirty.set()  # Retry on the next pass
+
+
+async def telegram_api(method: str, client: Optional[httpx.AsyncClient] = None, **params) -> dict:
+    """Helper to call the Telegram Bot API, on the send pool unless another client is given."""
+    # httpx would send None as an empty field; drop unset optional params instead
+    params = {k: v for k, v in params.items() if v is not None}
+    resp = await (client or telegram_client).post(f"/{method}", data=params)
+    data = orjson.loads(resp.content)
+    if not resp.is_success or not data.get("ok"):
         app.logger.error("Telegram API error: %s", resp.text)
-    return resp.json()
+    return data
 
 
-def set_webhook() -> None:
+async def set_webhook() -> None:
     """Register your webhook URL with Telegram (run once on startup)."""
     if not WEBHOOK_URL:
         app.logger.warning("WEBHOOK_URL not set; skipping setWebhook")
         return
 
     url = f"{WEBHOOK_URL}/webhook"
-    resp = requests.post(f"{API_URL}/setWebhook", data={"url": url})
-    app.logger.info("setWebhook response: %s", resp.text)
-
-
-def get_file_id(msg: Dict[str, Any]) -> Optional[Tuple[str, str]]:
-    """Extract file_id and type from a message with media."""
-    media_types = {
-        'photo': lambda m: m['photo'][-1]['file_id'],  # Last item is highest quality
-        'video': lambda m: m['video']['file_id'],
-        'document': lambda m: m['document']['file_id'],
-        'audio': lambda m: m['audio']['file_id'],
-        'voice': lambda m: m['voice']['file_id'],
-        'sticker': lambda m: m['sticker']['file_id']
+    params = {
+        "url": url,
+        # Only "message" updates are handled; don't let Telegram deliver the rest
+        "allowed_updates": orjson.dumps(["message"]).decode(),
+        "max_connections": WEBHOOK_MAX_CONNECTIONS,
     }
+    if WEBHOOK_SECRET:
+        params["secret_token"] = WEBHOOK_SECRET
+    else:
+        app.logger.warning("WEBHOOK_SECRET not set; /webhook will accept updates from anyone")
+    
+    resp = await telegram_client.post("/setWebhook", data=params)
+    try:
+        ok = orjson.loads(resp.content).get("ok")
+    except orjson.JSONDecodeError:
+        ok = False
+    if ok:
+        app.logger.info("setWebhook response: %s", resp.text)
+    else:
+        # Telegram keeps the previous registration, e.g. when secret_token has
+        # characters outside A-Za-z0-9_-; deliveries may then fail the secret check
+        app.logger.error("setWebhook failed: %s", resp.text)
+
+
+def get_file_id(msg: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """Extract file_id, type and send method from a message with media."""
+    # Text messages are the common case; rule them out with one C-level set check
+    if msg.keys().isdisjoint(MEDIA_KEYS):
+        return None
     
-    for media_type, extractor in media_types.items():
+    for media_type, method in MEDIA_TYPES:
         if media_type in msg:
             try:
-                return extractor(msg), media_type
+                media = msg[media_type]
+                if media_type == 'photo':
+                    media = media[-1]  # Last item is highest quality
+                return media['file_id'], media_type, method
             except (KeyError, IndexError):
                 app.logger.error(f"Failed to extract {media_type} file_id")
     
     return None
 
 
-def forward_media_message(chat_id: int, file_id: str, media_type: str, 
-                         caption: Optional[str] = None, 
-                         reply_to_message_id: Optional[int] = None) -> dict:
+async def forward_media_message(chat_id: int, file_id: str, media_type: str, method: str,
+                               caption: Optional[str] = None, 
+                               reply_to_message_id: Optional[int] = None) -> dict:
     """Forward a media message using its file_id."""
-    method_map = {
-        'photo': 'sendPhoto',
-        'video': 'sendVideo',
-        'document': 'sendDocument',
-        'audio': 'sendAudio',
-        'voice': 'sendVoice',
-        'sticker': 'sendSticker'
-    }
-    
-    method = method_map.get(media_type)
-    if not method:
-        app.logger.error(f"Unsupported media type: {media_type}")
-        return {}
-        
     params = {
         'chat_id': chat_id,
         media_type: file_id,
@@ -183,152 +443,252 @@ def forward_media_message(chat_id: int, file_id: str, media_type: str,
     if reply_to_message_id:
         params['reply_to_message_id'] = reply_to_message_id
         
-    return telegram_api(method, **params)
+    return await telegram_api(method, **params)
 
 
-@app.route("/", methods=["GET"])
-def healthcheck() -> tuple[str, int]:
-    return "OK", 200
-
+@functools.lru_cache(maxsize=1024)
+def format_user_info(reply_status: str, first_name: str, last_name: str, username: str, chat_id: int) -> str:
+    """Render the sender details sent to admins after a forward; repeat senders hit the cache."""
+    return (
+        f"{reply_status}From: {first_name} {last_name}\n"
+        f"Username: @{username}\n"
+        f"Chat ID: {chat_id}"
+    )
 
-@app.route("/webhook", methods=["GET", "POST"])
-def webhook() -> dict:
-    if request.method == "GET":
-        return ("This endpoint only accepts POST "
-                "from Telegram"), 200
 
-    update = request.get_json(force=True)
-    app.logger.info("Received update: %s", update)
+async def forward_to_admin(admin_id: int, chat_id: int, message_id: int, user_info: str) -> None:
+    """Forward a user message to one admin, then reply to it with the sender's info."""
+    admin_fwd = await telegram_api(
+        "forwardMessage",
+        chat_id=admin_id,
+        from_chat_id=chat_id,
+        message_id=message_id,
+    )
+    
+    if "result" in admin_fwd and "message_id" in admin_fwd["result"]:
+        admin_fwd_id = admin_fwd["result"]["message_id"]
+        # Store mapping for each admin's forwarded message while the info goes out
+        await asyncio.gather(
+            remember_forward(admin_fwd_id, chat_id, message_id),
+            telegram_api(
+                "sendMessage",
+                chat_id=admin_id,
+                text=user_info,
+                reply_to_message_id=admin_fwd_id,
+                client=notify_client,
+            ),
+        )
+    else:
+        app.logger.error("Failed to forward message to admin %s: %s", admin_id, admin_fwd)
 
-    if "message" in update:
-        msg = update["message"]
-        chat_id = msg["chat"]["id"]
-        user_id = msg.get("from", {}).get("id")
-        
-        # Handle messages FROM the admins
-        if user_id in ADMIN_IDS:
-            app.logger.info("Processing admin message from user %s", user_id)
-            
-            # Check if this is a reply to a forwarded message
-            if "reply_to_message" in msg:
-                reply_to_msg = msg["reply_to_message"]
-                reply_to_id = reply_to_msg["message_id"]
-                
-                # Check if the replied message was forwarded from a user
-                if reply_to_id in forward_map:
-                    orig_chat_id, orig_msg_id = forward_map[reply_to_id]
-                    app.logger.info("Found mapping, sending reply to chat %s", orig_chat_id)
-                    
-                    # Handle media replies
-                    media_info = get_file_id(msg)
-                    if media_info:
-                        file_id, media_type = media_info
-                        response = forward_media_message(
-                            orig_chat_id, 
-                            file_id, 
-                            media_type,
-                            msg.get('caption'),
-                            orig_msg_id
-                        )
-                    else:
-                        # Text reply - send as bot
-                        response = telegram_api(
-                            "sendMessage",
-                            chat_id=orig_chat_id,
-                            text=msg.get("text", ""),
-                            reply_to_message_id=orig_msg_id,
-                        )
-                    
-                    # Mark as replied and notify admin
-                    if response.get('ok'):
-                        replied_messages.add(orig_msg_id)
-                        save_data_to_gist()  # Save to Gist
-                        
-                        # Notify all admins about successful reply
-                        admin_name = msg['from'].get('first_name', 'Admin')
-                        for admin_id in ADMIN_IDS:
-                            telegram_api(
-                                "sendMessage",
-                                chat_id=admin_id,
-                                text=f"✅ Reply sent successfully by {admin_name}",
-                                reply_to_message_id=msg["message_id"] if admin_id == user_id else None
-                            )
-                    else:
-                        telegram_api(
-                            "sendMessage",
-                            chat_id=user_id,
-                            text="❌ Failed to send reply",
-                            reply_to_message_id=msg["message_id"]
-                        )
-                else:
-                    # This is a reply to a message that wasn't forwarded from a user
-                    app.logger.info("Reply to non-forwarded message, ignoring")
-            else:
-                # This is a direct message from admin to bot (not a reply)
-                app.logger.info("Direct message from admin to bot")
-            
-            return {"ok": True}
 
-        # Handle messages TO the bot (from regular users)
-        entities = msg.get("entities", [])
-        is_private = msg["chat"]["type"] == "private"
-        is_mention = any(
-            e["type"] in ("mention", "text_mention") for e in entities
+async def handle_admin_message(msg: Dict[str, Any], sender: Dict[str, Any]) -> None:
+    """Relay an admin's reply to a forwarded message back to the original user."""
+    user_id = sender["id"]
+    app.logger.debug("Processing admin message from user %s", user_id)
+    
+    # Check if this is a reply to a forwarded message
+    if "reply_to_message" not in msg:
+        # This is a direct message from admin to bot (not a reply)
+        app.logger.info("Direct message from admin to bot")
+        return
+    
+    reply_to_id = msg["reply_to_message"]["message_id"]
+    
+    # Check if the replied message was forwarded from a user
+    orig = await lookup_forward(reply_to_id)
+    if orig is None:
+        # This is a reply to a message that wasn't forwarded from a user
+        app.logger.info("Reply to non-forwarded message, ignoring")
+        return
+    
+    orig_chat_id, orig_msg_id = orig
+    app.logger.info("Found mapping, sending reply to chat %s", orig_chat_id)
+    
+    # Handle media replies
+    media_info = get_file_id(msg)
+    if media_info:
+        file_id, media_type, method = media_info
+        response = await forward_media_message(
+            orig_chat_id, 
+            file_id, 
+            media_type,
+            method,
+            msg.get('caption'),
+            orig_msg_id
         )
-
-        if is_private or is_mention:
-            app.logger.info("Forwarding message to admin")
-            
-            # Add "Replied" status if this is a reply to a message we've already replied to
-            reply_status = ""
-            if msg.get("reply_to_message", {}).get("message_id") in replied_messages:
-                reply_status = "✅ "
-            
-            # Forward the message to all admins
-            for admin_id in ADMIN_IDS:
-                # Forward message to each admin
-                admin_fwd = telegram_api(
-                    "forwardMessage",
+    else:
+        # Text reply - send as bot
+        response = await telegram_api(
+            "sendMessage",
+            chat_id=orig_chat_id,
+            text=msg.get("text", ""),
+            reply_to_message_id=orig_msg_id,
+        )
+    
+    # Mark as replied and notify admin
+    if response.get('ok'):
+        # Record the reply and notify all admins about it concurrently
+        admin_name = sender.get('first_name', 'Admin')
+        message_id = msg["message_id"]
+        await asyncio.gather(
+            mark_replied(orig_msg_id),
+            *(
+                telegram_api(
+                    "sendMessage",
                     chat_id=admin_id,
-                    from_chat_id=chat_id,
-                    message_id=msg["message_id"],
+                    text=f"✅ Reply sent successfully by {admin_name}",
+                    reply_to_message_id=message_id if admin_id == user_id else None,
+                    client=notify_client,
                 )
-                
-                if "result" in admin_fwd and "message_id" in admin_fwd["result"]:
-                    admin_fwd_id = admin_fwd["result"]["message_id"]
-                    # Store mapping for each admin's forwarded message
-                    forward_map[admin_fwd_id] = (chat_id, msg["message_id"])
-                    
-                    # Send user info after forwarded message
-                    user_info = (
-                        f"{reply_status}From: {msg['from'].get('first_name', '')} "
-                        f"{msg['from'].get('last_name', '')}\n"
-                        f"Username: @{msg['from'].get('username', 'N/A')}\n"
-                        f"Chat ID: {chat_id}"
-                    )
-                    
-                    telegram_api(
-                        "sendMessage",
-                        chat_id=admin_id,
-                        text=user_info,
-                        reply_to_message_id=admin_fwd_id
-                    )
-                else:
-                    app.logger.error("Failed to forward message to admin %s: %s", admin_id, admin_fwd)
-            
-            # Save the mapping after all forwards
-            save_data_to_gist()
-            
-            return {"ok": True}
+                for admin_id in ADMIN_IDS
+            ),
+        )
+    else:
+        await telegram_api(
+            "sendMessage",
+            chat_id=user_id,
+            text="❌ Failed to send reply",
+            reply_to_message_id=msg["message_id"],
+            client=notify_client,
+        )
+
+
+async def handle_user_message(msg: Dict[str, Any], sender: Dict[str, Any]) -> None:
+    """Forward a private message or mention from a regular user to all admins."""
+    chat = msg["chat"]
+    chat_id = chat["id"]
+    
+    # Private chats always forward; otherwise only mentions, and most messages carry no entities
+    if chat["type"] != "private":
+        entities = msg.get("entities")
+        if not entities or MENTION_TYPES.isdisjoint(e["type"] for e in entities):
+            return
+    
+    app.logger.debug("Forwarding message to admin")
+    
+    # Add "Replied" status if this is a reply to a message we've already replied to
+    reply_status = ""
+    if await is_replied(msg.get("reply_to_message", {}).get("message_id")):
+        reply_status = "✅ "
+    
+    # Send user info after each forwarded message
+    user_info = format_user_info(
+        reply_status,
+        sender.get("first_name", ""),
+        sender.get("last_name", ""),
+        sender.get("username", "N/A"),
+        chat_id,
+    )
+    
+    # Forward the message to all admins concurrently
+    await asyncio.gather(*(
+        forward_to_admin(admin_id, chat_id, msg["message_id"], user_info)
+        for admin_id in ADMIN_IDS
+    ))
+
+
+async def process_message(msg: Dict[str, Any]) -> None:
+    """Route an incoming message to the admin or user handler."""
+    # "from" is optional in the Bot API (e.g. messages sent on behalf of a chat)
+    sender = msg.get("from") or {}
+    if is_admin(sender.get("id")):
+        await handle_admin_message(msg, sender)
+    else:
+        await handle_user_message(msg, sender)
+
+
+@app.before_serving
+async def startup() -> None:
+    """Open the shared HTTP clients, load state, register the webhook and start the Gist flusher."""
+    global telegram_client, notify_client, github_client, redis_client, gist_flush_task
+    telegram_client = httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=TELEGRAM_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(http2=True, limits=HTTP_LIMITS, retries=HTTP_RETRIES),
+    )
+    notify_client = httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=TELEGRAM_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(http2=True, limits=NOTIFY_LIMITS, retries=HTTP_RETRIES),
+    )
+    github_client = httpx.AsyncClient(
+        base_url="https://api.github.com",
+        headers={
+            'Authorization': f'token {GITHUB_TOKEN}',
+            'Accept': 'application/vnd.github.v3+json'
+        },
+        timeout=10,
+        transport=httpx.AsyncHTTPTransport(http2=True, limits=HTTP_LIMITS, retries=HTTP_RETRIES),
+    )
+    if REDIS_URL:
+        redis_client = redis.Redis.from_url(REDIS_URL)
+    # Load existing data and register the webhook concurrently
+    await asyncio.gather(load_data_from_gist(), set_webhook())
+    gist_flush_task = asyncio.create_task(flush_gist_loop())
+
+
+@app.after_serving
+async def shutdown() -> None:
+    """Stop the Gist flusher, save any pending changes and close the shared HTTP clients."""
+    gist_flush_task.cancel()
+    try:
+        await gist_flush_task
+    except asyncio.CancelledError:
+        pass
+    if gist_dirty.is_set():
+        await save_data_to_gist()
+    await telegram_client.aclose()
+    await notify_client.aclose()
+    await github_client.aclose()
+    if redis_client:
+        await redis_client.aclose()
 
-    return {"ok": True}
+
+@app.route("/", methods=["GET"])
+async def healthcheck() -> tuple[str, int]:
+    return "OK", 200
+
+
+# Telegram only looks at the status code, so reuse prebuilt responses
+OK_RESPONSE = Response(b"", status=200)
+POST_ONLY_RESPONSE = Response(b"This endpoint only accepts POST from Telegram", status=200)
+
+
+@app.route("/webhook", methods=["GET", "POST"])
+async def webhook() -> Response:
+    if request.method == "GET":
+        return POST_ONLY_RESPONSE
+
+    # Reject anything that isn't from Telegram before reading the body
+    if WEBHOOK_SECRET:
+        token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+        if not hmac.compare_digest(token.encode(), WEBHOOK_SECRET.encode()):
+            abort(403)
+
+    try:
+        update = orjson.loads(await request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return "Invalid JSON", 400
+    if not isinstance(update, dict):
+        return "Invalid JSON", 400
+    if app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug("Received update: %s", update)
+
+    msg = update.get("message")
+    if msg:
+        # Acknowledge right away; the Telegram API calls happen after the response
+        app.add_background_task(process_message, msg)
+    
+    return OK_RESPONSE
 
 
 if __name__ == "__main__":
-    load_data_from_gist()  # Load existing data on startup
-    set_webhook()
-    app.run(
-        host="0.0.0.0",
-        port=int(os.environ.get("PORT", 5000)),
-        debug=True
-    )
+    # Serve with Hypercorn rather than Quart's development server; equivalent to
+    #   hypercorn main:app --workers 1 --worker-class asyncio
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    
+    config = Config()
+    config.bind = [f"0.0.0.0:{int(os.environ.get('PORT', 5000))}"]
+    asyncio.run(serve(app, config))
@@ -0,0 +1,5 @@
+import os
+
+# main reads its configuration from the environment at import time
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-token")
+os.environ.setdefault("ADMIN_CHAT_IDS", "1")
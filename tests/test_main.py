@@ -0,0 +1,149 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+from cachetools import TTLCache
+
+import main
+
+
+class MockGitHub:
+    """httpx handler standing in for the GitHub API; records requests and replays canned responses."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.responses.get(request.method) or httpx.Response(200, json={})
+
+    def patched_files(self) -> dict:
+        """Decode the file contents of the last Gist PATCH."""
+        patch = [r for r in self.requests if r.method == "PATCH"][-1]
+        files = orjson.loads(patch.content)["files"]
+        return {name: orjson.loads(f["content"]) for name, f in files.items()}
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """Fresh in-memory state, so tests don't share forward mappings or replied flags."""
+    monkeypatch.setattr(main, "REDIS_URL", None)
+    monkeypatch.setattr(main, "redis_client", None)
+    monkeypatch.setattr(main, "forward_map", TTLCache(maxsize=main.STATE_MAX_SIZE, ttl=main.STATE_TTL))
+    monkeypatch.setattr(main, "replied_messages", TTLCache(maxsize=main.STATE_MAX_SIZE, ttl=main.STATE_TTL))
+
+
+@pytest.fixture
+def github(monkeypatch, tmp_path, state):
+    """Configure the Gist against a mock GitHub API."""
+    mock = MockGitHub()
+    monkeypatch.setattr(main, "GITHUB_TOKEN", "gh-token")
+    monkeypatch.setattr(main, "GIST_ID", "gist-id")
+    monkeypatch.setattr(main, "GIST_CACHE_FILE", str(tmp_path / "gist_cache.json"))
+    monkeypatch.setattr(main, "gist_loaded", False)
+    monkeypatch.setattr(main, "github_client", httpx.AsyncClient(
+        base_url="https://api.github.com", transport=httpx.MockTransport(mock),
+    ))
+    return mock
+
+
+@pytest.mark.parametrize("chat_id, msg_id", [
+    (77, 5),
+    (-1001234567890, 1),  # Supergroup
+    (-1001234567890, 2**31 - 1),
+    (-1, 0),
+])
+def test_pack_forward_round_trip(chat_id, msg_id):
+    assert main.unpack_forward(main.pack_forward(chat_id, msg_id)) == (chat_id, msg_id)
+
+
+@pytest.mark.parametrize("headers, body, status", [
+    ({}, b'{"update_id": 1}', 403),
+    ({"X-Telegram-Bot-Api-Secret-Token": "wrong"}, b'{"update_id": 1}', 403),
+    ({"X-Telegram-Bot-Api-Secret-Token": "s3cret"}, b'not json', 400),
+    ({"X-Telegram-Bot-Api-Secret-Token": "s3cret"}, b'[]', 400),
+    ({"X-Telegram-Bot-Api-Secret-Token": "s3cret"}, b'{"update_id": 1}', 200),
+])
+def test_webhook_status(monkeypatch, headers, body, status):
+    monkeypatch.setattr(main, "WEBHOOK_SECRET", "s3cret")
+
+    async def post():
+        response = await main.app.test_client().post("/webhook", data=body, headers=headers)
+        return response.status_code
+
+    assert asyncio.run(post()) == status
+
+
+def test_load_unchanged_gist_from_local_copy(github):
+    with open(main.GIST_CACHE_FILE, "wb") as f:
+        f.write(orjson.dumps({
+            "etag": '"abc"',
+            "files": {
+                "forward_map.json": orjson.dumps({"101": [-1001234567890, 5]}).decode(),
+                "replied_messages.json": "[5]",
+            },
+        }))
+    github.responses["GET"] = httpx.Response(304)
+
+    asyncio.run(main.load_data_from_gist())
+
+    assert github.requests[0].headers["If-None-Match"] == '"abc"'
+    assert main.gist_loaded
+    assert main.unpack_forward(main.forward_map[101]) == (-1001234567890, 5)
+    assert 5 in main.replied_messages
+
+
+def test_truncated_gist_is_not_loaded_or_overwritten(github):
+    github.responses["GET"] = httpx.Response(200, json={"files": {
+        "forward_map.json": {"content": '{"101": [77', "truncated": True},
+    }})
+
+    asyncio.run(main.load_data_from_gist())
+    asyncio.run(main.remember_forward(102, 77, 6))
+
+    assert not main.gist_loaded
+    assert asyncio.run(main.save_data_to_gist())
+    assert [r.method for r in github.requests] == ["GET"]
+
+
+def test_gist_snapshot_keeps_newest_entries(monkeypatch, github):
+    monkeypatch.setattr(main, "GIST_MAX_ENTRIES", 3)
+    monkeypatch.setattr(main, "gist_loaded", True)
+    for msg_id in range(1, 6):
+        asyncio.run(main.remember_forward(100 + msg_id, 77, msg_id))
+        asyncio.run(main.mark_replied(msg_id))
+
+    assert asyncio.run(main.save_data_to_gist())
+
+    files = github.patched_files()
+    assert files["forward_map.json"] == {"103": [77, 3], "104": [77, 4], "105": [77, 5]}
+    assert files["replied_messages.json"] == [3, 4, 5]
+
+
+def test_gist_snapshot_keeps_lru_order(monkeypatch, github):
+    monkeypatch.setattr(main, "gist_loaded", True)
+    monkeypatch.setattr(main, "forward_map", TTLCache(maxsize=3, ttl=main.STATE_TTL))
+    for fwd_id in (10, 11, 12):
+        asyncio.run(main.remember_forward(fwd_id, 77, fwd_id))
+    asyncio.run(main.lookup_forward(10))
+
+    asyncio.run(main.save_data_to_gist())
+    asyncio.run(main.remember_forward(13, 77, 13))
+
+    # The lookup made 11 the least recently used; saving must not have changed that
+    assert sorted(main.forward_map) == [10, 12, 13]
+
+
+def test_late_load_merges_beneath_newer_state(github):
+    main.forward_map[102] = main.pack_forward(77, 6)
+    github.responses["GET"] = httpx.Response(200, json={"files": {
+        "forward_map.json": {"content": '{"101": [77, 5], "102": [77, 1]}'},
+    }})
+
+    asyncio.run(main.load_data_from_gist())
+
+    assert main.gist_loaded
+    assert list(main.forward_map) == [101, 102]
+    assert main.unpack_forward(main.forward_map[102]) == (77, 6)